@@ -1,14 +1,54 @@
 import os
+import re
+import math
 import sys
+import csv
+import gzip
+import json
+import hashlib
+import tempfile
 import logging
 import datetime
 import argparse
+from urllib.parse import quote_plus, urlencode
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
+import numpy as np
 import geopandas as gpd
+import shapely
 from pyogrio.errors import DataSourceError
 from shapely import GEOSException
 import xml.etree.ElementTree as ET
 
+# Optional streaming JSON parser, responses are fully loaded with requests when missing
+try:
+    import ijson
+    JSON_STREAM_ERRORS = (ValueError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    JSON_STREAM_ERRORS = (ValueError,)
+
+# Optional fast JSON parser, orjson.JSONDecodeError is a subclass of ValueError
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# RFC3339 full-date pattern (YYYY-MM-DD)
+RFC3339_DATE_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})')
+
+# Size of the write buffer used for CSV outputs
+CSV_BUFFER_SIZE = 1 << 20
+
+# Gzip compression level of compressed CSV outputs, low levels are much faster for a small size cost
+CSV_COMPRESS_LEVEL = 1
+
+# Labels of the AWIC mission codes (0, 1, 2), unknown codes are mapped to the last entry
+MISSION_LABELS = np.array(["Sentinel-1 Sentinel-2", "Sentinel-1", "Sentinel-2", ""], dtype=object)
+
 
 def str2bool(v):
     """Transforms input string into boolean
@@ -30,7 +70,7 @@ def str2bool(v):
     elif v.lower() in ('no', 'false', 'f', 'n', '0'):
         return False
     else:
-        raise argparse.ArgumentTypeError('Boolean value expected for requestGeometries parameter.')
+        raise argparse.ArgumentTypeError('Boolean value expected.')
 
 def validate_Rfc3339(date_text):
     """Checks the format of the date
@@ -45,11 +85,14 @@ def validate_Rfc3339(date_text):
         string: input date if the format matches YYYY-MM-DD
     """
 
+    match = RFC3339_DATE_PATTERN.fullmatch(date_text) if isinstance(date_text, str) else None
+    if match is None:
+        raise ValueError("Incorrect date format, should be YYYY-MM-DD")
     try:
-        datetime.datetime.strptime(date_text, '%Y-%m-%d')
-        return date_text
-    except:
+        datetime.date(*map(int, match.groups()))
+    except ValueError:
         raise ValueError("Incorrect date format, should be YYYY-MM-DD")
+    return date_text
 
 def format_awic_product(awic, index):
     """Formats a raw AWIC product entry into a structured list
@@ -66,10 +109,18 @@ def format_awic_product(awic, index):
     """
     try:
         time_str = f"{awic[2]:06d}"
-        observation_datetime = datetime.datetime.strptime(
-            f"{awic[1]}T{time_str}", "%Y%m%dT%H%M%S"
-        ).strftime('%Y-%m-%dT%H:%M:%S')
-    except (ValueError, IndexError) as e:
+        date_str = str(awic[1])
+    except (ValueError, TypeError, IndexError) as e:
+        raise ValueError(f"Invalid date/time in AWIC product: {e}")
+    if len(date_str) != 8 or not (date_str.isascii() and date_str.isdigit()) \
+            or len(time_str) != 6 or not time_str.isdigit():
+        raise ValueError(f"Invalid date/time in AWIC product: {date_str} {time_str}")
+    try:
+        observation_datetime = datetime.datetime(
+            int(date_str[0:4]), int(date_str[4:6]), int(date_str[6:8]),
+            int(time_str[0:2]), int(time_str[2:4]), int(time_str[4:6])
+        ).isoformat()
+    except ValueError as e:
         raise ValueError(f"Invalid date/time in AWIC product: {e}")
     
     mission_code = awic[12] if len(awic) > 12 else None
@@ -90,6 +141,112 @@ def format_awic_product(awic, index):
     
     return awic_formatted
 
+def format_awic_products(raw_products, indexes):
+    """Formats raw AWIC product entries into structured lists, column by column
+
+    Args:
+        raw_products (list): raw AWIC product entries, see format_awic_product for the expected format
+        indexes (list): index of each product
+
+    Returns:
+        list: A list of formatted AWIC products, see format_awic_product for the output format
+    """
+    if len(raw_products) == 0:
+        return []
+
+    try:
+        raw = np.array(raw_products, dtype=object)
+    except ValueError:
+        raw = None
+    if raw is None or raw.ndim != 2 or raw.shape[1] < 13:
+        # Irregular entries, fall back to the row by row formatting
+        return [format_awic_product(awic, i) for awic, i in zip(raw_products, indexes)]
+
+    # Dates must be exactly 8 ASCII digits, as in format_awic_product
+    dates = raw[:, 1].astype(str)
+    if not np.all(np.char.str_len(dates) == 8):
+        raise ValueError("Invalid date/time in AWIC product: date must be YYYYMMDD")
+    date_chars = np.ascontiguousarray(dates).view('U1')
+    if not np.all((date_chars >= '0') & (date_chars <= '9')):
+        raise ValueError("Invalid date/time in AWIC product: date must be YYYYMMDD")
+    dates = dates.astype(np.int64)
+
+    if not all(isinstance(t, (int, np.integer)) for t in raw[:, 2]):
+        raise ValueError("Invalid date/time in AWIC product: time must be a positive HHMMSS integer")
+    times = raw[:, 2].astype(np.int64)
+    if np.any(times < 0):
+        raise ValueError("Invalid date/time in AWIC product: time must be a positive HHMMSS integer")
+
+    # Build the 'YYYY-MM-DDTHH:MM:SS' strings from the integer date and time components
+    year, month, day = dates // 10000, dates // 100 % 100, dates % 100
+    hour, minute, second = times // 10000, times // 100 % 100, times % 100
+    month_start = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    observation_day = month_start.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    if np.any((year < 1) | (month < 1) | (month > 12) | (day < 1) | (observation_day.astype('datetime64[M]') != month_start)
+              | (hour > 23) | (minute > 59) | (second > 59)):
+        raise ValueError("Invalid date/time in AWIC product: out of range value")
+    observation_datetimes = np.datetime_as_string(
+        observation_day.astype('datetime64[s]') + (hour * 3600 + minute * 60 + second).astype('timedelta64[s]'),
+        unit='s'
+    )
+
+    mission_codes = raw[:, 12]
+    known_codes = np.isin(mission_codes, [0, 1, 2])
+    mission = MISSION_LABELS[np.where(known_codes, mission_codes, 3).astype(np.int64)]
+
+    awic_formatted = np.column_stack((
+        np.asarray(indexes, dtype=np.int64).astype(object) + 1,
+        raw[:, 0],
+        observation_datetimes.astype(object),
+        raw[:, 3:12],
+        mission
+    ))
+
+    return awic_formatted.tolist()
+
+def split_geometry(geometry_wkt, tile_size, max_tiles):
+    """Splits a WKT geometry along a regular grid of square tiles
+
+    Args:
+        geometry_wkt (str): Geometry in WKT format
+        tile_size (float): Size of the tiles, in the units of the geometry coordinate system
+        max_tiles (int): Maximum number of cells of the tile grid
+
+    Raises:
+        ValueError: if the tile size is not strictly positive or the grid would exceed max_tiles cells
+
+    Returns:
+        list: WKT of the non-empty tile geometries, or [geometry_wkt] if the geometry fits in a single tile
+    """
+    if not tile_size > 0:
+        raise ValueError(f"tile size must be strictly positive, got {tile_size}")
+
+    geometry = shapely.from_wkt(geometry_wkt)
+    xmin, ymin, xmax, ymax = geometry.bounds
+    if xmax - xmin <= tile_size and ymax - ymin <= tile_size:
+        return [geometry_wkt]
+
+    nx = max(1, math.ceil((xmax - xmin) / tile_size))
+    ny = max(1, math.ceil((ymax - ymin) / tile_size))
+    if nx * ny > max_tiles:
+        raise ValueError(f"tile size {tile_size} would split the geometry into {nx * ny} tiles, "
+                         f"more than the maximum of {max_tiles}")
+
+    x = (xmin + tile_size * np.arange(nx))[:, np.newaxis]
+    y = (ymin + tile_size * np.arange(ny))[np.newaxis, :]
+    tiles = shapely.intersection(shapely.box(x, y, x + tile_size, y + tile_size).ravel(), geometry)
+
+    # Keep only the polygonal parts of tiles where the geometry also touches the tile border
+    for i in np.flatnonzero(shapely.get_type_id(tiles) == shapely.GeometryType.GEOMETRYCOLLECTION):
+        parts = shapely.get_parts(tiles[i])
+        polygonal = np.isin(shapely.get_type_id(parts), (shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON))
+        tiles[i] = shapely.union_all(parts[polygonal])
+
+    # Drop empty tiles and the lines left where the geometry only touches a tile border
+    tiles = tiles[shapely.area(tiles) > 0]
+
+    return shapely.to_wkt(tiles).tolist()
+
 class AwicRequest(object):
     '''
     Request awic products in the catalogue.
@@ -119,10 +276,30 @@ class AwicRequest(object):
     #URL parameter : output_srid
     URL_PARAM_OUTPUT_SRID_GEOMETRY = 'output_srid'
     
+    # Timeout of the HTTP requests, in seconds
+    REQUEST_TIMEOUT = 30
+
+    # Maximum URL length sent as a GET request, longer requests are sent as POST forms
+    MAX_URL_LENGTH = 6000
+
+    # Maximum number of tile requests sent concurrently
+    MAX_TILE_WORKERS = 8
+
+    # Maximum number of cells of the tile grid used to split large geometries
+    MAX_TILES = 1000
+
     #URL of metadata
     METADATA_URL = ET.Element("MT_Metadata", url="https://sdi.eea.europa.eu/catalogue/srv/eng/catalog.search#/metadata/5752e8b5-ecda-4013-8eb9-e27f8515b87e")
 
-    def __init__(self, outputDir, returnMode):
+    #Columns of the CSV outputs
+    AWIC_CSV_HEADER = ('id', 'geometries_id', 'datetime', 'water_perc', 'ice_perc', 'other_perc', 'cloud_perc',
+                       'shdw_perc', 'nd_perc', 'qa', 's1_perc', 's2_perc', 'source')
+    GEOMETRIES_CSV_HEADER = ('id', 'geometry', 'basin_name', 'eu_hydro_id', 'object_nam', 'area', 'river_km')
+
+    #Content of the metadata XML file
+    METADATA_XML = ET.tostring(METADATA_URL, encoding='utf8', method='xml')
+
+    def __init__(self, outputDir, returnMode, compressCsv=False):
         if outputDir is not None:
             self.outputDir = os.path.abspath(outputDir)
             if returnMode != "variable":
@@ -134,24 +311,61 @@ class AwicRequest(object):
         else:
             self.outputDir = None
         self.awic_http_request = None
+        self.awic_tile_http_requests = []
         self.geometry_http_request = None
         self.awic_result_file = None
+        self.compress_csv = compressCsv
+
+        # Single HTTP session, so that both requests reuse the same pooled connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4,
+                              pool_maxsize=AwicRequest.MAX_TILE_WORKERS + 1,
+                              max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount('https://', adapter)
 
     def set_awic_http_request(self, awic_http_request):
         self.awic_http_request = awic_http_request
 
+    def set_awic_tile_http_requests(self, awic_tile_http_requests):
+        self.awic_tile_http_requests = awic_tile_http_requests
+
     def set_geometry_http_request(self, geometry_http_request):
         self.geometry_http_request = geometry_http_request
 
     def set_awic_result_file(self, awic_result_file):
         self.awic_result_file = awic_result_file
 
+    def csv_file_name(self, name):
+        """Returns the name of a CSV output file, with a .gz extension if CSV compression is enabled.
+
+        Args:
+            name (str): Base name of the CSV file, without extension.
+
+        Returns:
+            str: File name of the CSV output.
+        """
+        return name + ('.csv.gz' if self.compress_csv else '.csv')
+
+    def open_csv(self, path):
+        """Opens a CSV output file for writing, gzip-compressed if its name ends with .gz.
+
+        Args:
+            path (str): Path of the CSV file.
+
+        Returns:
+            file object: Text file object to be used with csv.writer.
+        """
+        if path.endswith('.gz'):
+            return gzip.open(path, 'wt', compresslevel=CSV_COMPRESS_LEVEL, encoding='utf8', newline='')
+        return open(path, 'w', encoding='utf8', newline='', buffering=CSV_BUFFER_SIZE)
+
     def build_request(self,
                         startDate=None,
                         completionDate=None,
                         geometrywkt_wgs84=None,
                         geometrywkt_laea=None,
-                        cloudCoverageMax=None):
+                        cloudCoverageMax=None,
+                        tileSize=None):
         """Build the request to access HR-S&I catalogue.
 
         Args:
@@ -160,6 +374,8 @@ class AwicRequest(object):
             geometrywkt_wgs84 (str, optional): Geometry in WGS84 WKT format.. Defaults to None.
             geometrywkt_laea (str, optional): Geometry in LAEA WKT format.. Defaults to None.
             cloudCoverageMax (int, optional): Maximum percentage of cloud coverage allowed.. Defaults to None.
+            tileSize (float, optional): If set, the AWIC request is split into one request per tile of this size,
+                in the units of the geometry (degrees for WGS84, meters for LAEA).. Defaults to None.
         """
         # URL parameters.
         url_params = {}
@@ -168,12 +384,12 @@ class AwicRequest(object):
             sys.exit()
         
         if geometrywkt_wgs84 is not None:
-            geometry = geometrywkt_wgs84.replace(',', '%2C').replace(' ', '+')
+            geometry = geometrywkt_wgs84
             url_param_geometry_key = AwicRequest.URL_PARAM_GEOMETRYWKT_WGS84
             output_srid = "wgs84"
 
         elif geometrywkt_laea is not None:
-            geometry = geometrywkt_laea.replace(',', '%2C').replace(' ', '+')
+            geometry = geometrywkt_laea
             url_param_geometry_key = AwicRequest.URL_PARAM_GEOMETRYWKT_LAEA
             output_srid = "laea"
 
@@ -195,12 +411,30 @@ class AwicRequest(object):
 
         if(url_params):
             self.set_awic_http_request(AwicRequest.URL_ROOT + AwicRequest.AWIC_PROC + \
-                      '?' + \
-                      '&'.join(['%s=%s'%(key, value) for key, value in url_params.items()])
+                      '?' + urlencode(url_params, quote_via=quote_plus)
             )
 
+            # Split large geometries into tiles, requested separately
+            if tileSize is not None:
+                try:
+                    tiles = split_geometry(geometry, float(tileSize), AwicRequest.MAX_TILES)
+                except (ValueError, GEOSException) as e:
+                    logging.error(f"-tileSize : {e}")
+                    sys.exit()
+                if len(tiles) > 1:
+                    logging.info(f"Splitting the AWIC request into {len(tiles)} tiles")
+                    self.set_awic_tile_http_requests([
+                        AwicRequest.URL_ROOT + AwicRequest.AWIC_PROC + '?' + \
+                        urlencode({**url_params, url_param_geometry_key: tile}, quote_via=quote_plus)
+                        for tile in tiles
+                    ])
+
+            geometry_params = {
+                url_param_geometry_key: geometry,
+                AwicRequest.URL_PARAM_OUTPUT_SRID_GEOMETRY: output_srid
+            }
             self.set_geometry_http_request(AwicRequest.URL_ROOT + AwicRequest.GEOMETRY_PROC + \
-                      '?' + f'{url_param_geometry_key}={geometry}&{AwicRequest.URL_PARAM_OUTPUT_SRID_GEOMETRY}={output_srid}'
+                      '?' + urlencode(geometry_params, quote_via=quote_plus)
             )
 
         else:
@@ -208,6 +442,28 @@ class AwicRequest(object):
             sys.exit()
 
 
+    def send_request(self, http_request, **kwargs):
+        """Sends an HTTP request to the API through the shared session.
+
+        The request is sent as a GET, unless the URL exceeds MAX_URL_LENGTH, in which case
+        its query string is sent as a form-encoded POST body to avoid 414 errors.
+
+        Args:
+            http_request (str): The full URL of the HTTP request.
+            **kwargs: Additional arguments passed to requests.Session.request.
+
+        Returns:
+            requests.Response: The HTTP response.
+        """
+        method, url = 'GET', http_request
+        if len(http_request) > AwicRequest.MAX_URL_LENGTH:
+            url, _, query = http_request.partition('?')
+            method = 'POST'
+            kwargs['data'] = query
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'Content-Type': 'application/x-www-form-urlencoded'}
+
+        return self.session.request(method, url, timeout=AwicRequest.REQUEST_TIMEOUT, **kwargs)
+
     def execute_request(self, returnMode, request_geometries=False):
         """Executes the AWIC and geometry HTTP requests, retrieves and optionally saves data.
 
@@ -227,48 +483,46 @@ class AwicRequest(object):
             logging.error("No geometry_http_request was provided or configured")
             sys.exit()
 
-        # Request geometry
+        # Request geometry and AWIC products, concurrently when both are needed
         if request_geometries:
-            geometries = self.request_geometry(
-                self.geometry_http_request,
-                returnMode,
-                geometriesPath=self.outputDir
-            )
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                geometries_future = executor.submit(
+                    self.request_geometry,
+                    self.geometry_http_request,
+                    returnMode,
+                    geometriesPath=self.outputDir
+                )
+                awic_future = executor.submit(self.request_awic)
+                geometries = geometries_future.result()
+                awic_products = awic_future.result()
         else:
             geometries = None
+            awic_products = self.request_awic()
 
-        # Request AWIC products
-        awic_products = self.request_page(self.awic_http_request)
         if len(awic_products) == 0:
             logging.warning("No AWIC data was found")
         else:
             logging.info(f"Found {len(awic_products)} AWIC products.")
 
-        # Save AWIC results to CSV if needed
+        # Save AWIC results to CSV and write metadata XML file if needed.
+        # Products were formatted once by request_page and are written as is.
         if returnMode in ('csv', 'csv_and_variable'):
-            self.set_awic_result_file(os.path.join(self.outputDir, "awic.csv"))
+            self.set_awic_result_file(os.path.join(self.outputDir, self.csv_file_name("awic")))
             logging.info(f"Writing AWIC data to {self.awic_result_file}")
             try:
-                with open(self.awic_result_file, 'w') as f:
-                    f.write(
-                        'id;geometries_id;datetime;water_perc;ice_perc;other_perc;cloud_perc;shdw_perc;nd_perc;qa;s1_perc;s2_perc;source\n'
-                    )
-                    for p in awic_products:
-                        line = ';'.join(str(x) for x in p) + '\n'
-                        f.write(line)
+                with self.open_csv(self.awic_result_file) as f:
+                    writer = csv.writer(f, delimiter=';', lineterminator='\n')
+                    writer.writerow(AwicRequest.AWIC_CSV_HEADER)
+                    writer.writerows(awic_products)
             except IOError as e:
                 logging.error(f"Error writing AWIC CSV file: {e}")
                 sys.exit()
 
-
-        # Write metadata XML file
-        if returnMode in ('csv', 'csv_and_variable'):
             mtd_path = os.path.join(self.outputDir, "AWIC_MTD.xml")
             logging.info(f"Writing metadata link into {mtd_path}")
             try:
-                with open(os.path.join(self.outputDir, "AWIC_MTD.xml"), 'w') as f:
-                    f.write(ET.tostring(AwicRequest.METADATA_URL, encoding='utf8', method='xml').decode())
-                    f.close()
+                with open(mtd_path, 'wb') as f:
+                    f.write(AwicRequest.METADATA_XML)
             except IOError as e:
                 logging.error(f"Error writing metadata XML: {e}")
                 sys.exit()
@@ -294,7 +548,7 @@ class AwicRequest(object):
         logging.info(f'Executing request for geometries: {http_request}')
         
         try:
-            response = requests.get(http_request)
+            response = self.send_request(http_request)
         except requests.RequestException as e:
             logging.error(f"HTTP request failed: {e}")
             sys.exit(500)
@@ -304,14 +558,23 @@ class AwicRequest(object):
             sys.exit(500)
         
         try:
-            json_root = response.json()
+            json_root = json_loads(response.content)
         except ValueError:
-            logging.error("Failed to parse JSON response")
-            sys.exit(500)
+            json_root = None
 
         if isinstance(json_root, dict) and json_root.get('code') == '0100E':
             logging.error(f"API returned error: {json_root.get('message')}")
             sys.exit(413)
+
+        try:
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.error(f"HTTP request failed: {e}")
+            sys.exit(500)
+
+        if json_root is None:
+            logging.error("Failed to parse JSON response")
+            sys.exit(500)
             
         geometries = []
         
@@ -324,14 +587,13 @@ class AwicRequest(object):
             if not geometriesPath:
                 logging.error("Geometries path must be provided for CSV output.")
                 sys.exit(500)
-            output_file = os.path.join(geometriesPath, "geometries.csv")
+            output_file = os.path.join(geometriesPath, self.csv_file_name("geometries"))
             logging.info(f"Writing geometries to {output_file}")
             try:
-                with open(output_file, 'w', encoding='utf8') as f:
-                    f.write('id;geometry;basin_name;eu_hydro_id;object_nam;area;river_km\n')
-                    for p in geometries:
-                        line = ';'.join(str(x) for x in p) + '\n'
-                        f.write(line)
+                with self.open_csv(output_file) as f:
+                    writer = csv.writer(f, delimiter=';', lineterminator='\n')
+                    writer.writerow(AwicRequest.GEOMETRIES_CSV_HEADER)
+                    writer.writerows(geometries)
             except IOError as e:
                 logging.error(f"Failed to write geometries file: {e}")
                 sys.exit(500)
@@ -339,11 +601,44 @@ class AwicRequest(object):
         return geometries
 
 
-    def request_page(self, http_request):
-        """ Sends an HTTP GET request to retrieve a page of AWIC products and formats them.
+    def request_awic(self):
+        """Retrieves the AWIC products of the configured request, tile by tile if the request was split.
+
+        Returns:
+            list: A list of formatted AWIC products.
+        """
+        if not self.awic_tile_http_requests:
+            return self.request_page(self.awic_http_request)
+
+        # Any failed tile aborts the whole request, since merging the others would give an incomplete result
+        max_workers = min(len(self.awic_tile_http_requests), AwicRequest.MAX_TILE_WORKERS)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pages = list(executor.map(lambda http_request: self.request_page(http_request, exit_on_error=True),
+                                      self.awic_tile_http_requests))
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+        # Merge tiles, dropping the products of river segments shared by several tiles, and renumber them
+        awic_products = []
+        seen = set()
+        for page in pages:
+            for product in page:
+                key = (product[1], product[2])
+                if key not in seen:
+                    seen.add(key)
+                    product[0] = len(awic_products) + 1
+                    awic_products.append(product)
+
+        return awic_products
+
+    def request_page(self, http_request, exit_on_error=False):
+        """ Sends an HTTP request to retrieve a page of AWIC products and formats them.
+        The request is a GET, or a POST form if the URL exceeds MAX_URL_LENGTH (see send_request).
 
         Args:
             http_request (str):  The full URL of the HTTP request.
+            exit_on_error (bool, optional): Whether to exit instead of returning an empty list if the request fails.. Defaults to False.
 
         Returns:
             list: A list of formatted AWIC products.
@@ -353,31 +648,44 @@ class AwicRequest(object):
         logging.info('Executing request for AWIC: %s'%http_request)
         
         try:
-            response = requests.get(http_request, timeout=30)
-            response.raise_for_status()
+            response = self.send_request(http_request, stream=ijson is not None)
         except requests.exceptions.RequestException as e:
             logging.error(f"Error during HTTP request: {e}")
+            if exit_on_error:
+                sys.exit(500)
             return []
 
-        # Read JSON response
+        # Read JSON response and extract AWIC products, item by item when ijson is available.
+        # The body is read here when streaming, so transport errors of the raw urllib3 stream are caught too.
         try:
-            json_root = response.json()
-        except ValueError:
+            response.raise_for_status()
+            if ijson is not None:
+                response.raw.decode_content = True
+                json_items = ijson.items(response.raw, 'item', use_float=True)
+            else:
+                json_items = json_loads(response.content)
+            indexed_products = [(i, item.get('j')) for i, item in enumerate(json_items) if item.get('j')]
+        except (requests.exceptions.RequestException, Urllib3HTTPError) as e:
+            logging.error(f"Error during HTTP request: {e}")
+            if exit_on_error:
+                sys.exit(500)
+            return []
+        except JSON_STREAM_ERRORS:
             logging.error("Error: Response content is not valid JSON.")
+            if exit_on_error:
+                sys.exit(500)
             return []
+        finally:
+            response.close()
 
-        # Extract and format AWIC products
-        awic_products = []
-        for i, item in enumerate(json_root):
-            raw_awic = item.get('j')
-            if raw_awic:
-                formatted = format_awic_product(raw_awic, i)
-                awic_products.append(formatted)
+        # Format AWIC products
+        indexes = [i for i, _ in indexed_products]
+        raw_products = [raw_awic for _, raw_awic in indexed_products]
 
-        return awic_products
+        return format_awic_products(raw_products, indexes)
 
 
-def download_awic_products(returnMode, outputDir=None, startDate=None, completionDate=None, geometrywkt_wgs84=None, geometrywkt_laea=None, cloudCoverageMax=None, requestGeometries=False):
+def download_awic_products(returnMode, outputDir=None, startDate=None, completionDate=None, geometrywkt_wgs84=None, geometrywkt_laea=None, cloudCoverageMax=None, requestGeometries=False, compressCsv=False, tileSize=None):
     """Downloads AWIC products based on the given criteria and return mode.
 
     Args:
@@ -389,6 +697,9 @@ def download_awic_products(returnMode, outputDir=None, startDate=None, completio
         geometrywkt_laea (str, optional): Geometry in LAEA WKT format.. Defaults to None.
         cloudCoverageMax (int, optional): Maximum percentage of cloud coverage allowed.. Defaults to None.
         requestGeometries (bool, optional): Whether to retrieve geometries.. Defaults to False.
+        compressCsv (bool, optional): Whether to write gzip-compressed CSV files (.csv.gz).. Defaults to False.
+        tileSize (float, optional): Size of the tiles used to split large geometries into concurrent requests,
+            in the units of the geometry (degrees for WGS84, meters for LAEA).. Defaults to None.
 
     Returns:
         tuple: (geometries, awic_products) or (None, None) depending on returnMode.
@@ -400,7 +711,7 @@ def download_awic_products(returnMode, outputDir=None, startDate=None, completio
     if returnMode in {'csv', 'csv_and_variable'} and outputDir is None:
         raise ValueError("outputDir must be specified for csv and csv_and_variable return modes")
 
-    awic = AwicRequest(outputDir, returnMode)
+    awic = AwicRequest(outputDir, returnMode, compressCsv=compressCsv)
 
     # Build URL request
     awic.build_request(
@@ -408,7 +719,8 @@ def download_awic_products(returnMode, outputDir=None, startDate=None, completio
         completionDate=completionDate,
         geometrywkt_wgs84=geometrywkt_wgs84,
         geometrywkt_laea=geometrywkt_laea,
-        cloudCoverageMax=cloudCoverageMax
+        cloudCoverageMax=cloudCoverageMax,
+        tileSize=tileSize
     )
 
     # Query HTTP API to list results
@@ -421,12 +733,67 @@ def download_awic_products(returnMode, outputDir=None, startDate=None, completio
 
     return geometries, awic_products
 
+def geometry_cache_path(geometry_file):
+    '''
+    Returns the path of the cached (epsg, wkt) of a vector file, in a per-user cache directory.
+    Each vector file has a single entry, replaced whenever the file or one of its sidecar files is modified.
+    '''
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    name = hashlib.md5(os.path.abspath(geometry_file).encode(), usedforsecurity=False).hexdigest()
+    return os.path.join(cache_dir, 'clms_hrwsi_awic', f"geometry_{name}.json")
+
+def geometry_file_key(geometry_file):
+    '''
+    Returns the name, modification time and size of a vector file and of every file sharing its stem
+    (shapefile .prj/.dbf/.shx sidecars, GeoPackage -wal/-shm files, ...), or None if it cannot be cached.
+    '''
+    if not os.path.isfile(geometry_file):
+        return None
+    directory, name = os.path.split(os.path.abspath(geometry_file))
+    prefix = os.path.splitext(name)[0] + '.'
+    try:
+        with os.scandir(directory) as entries:
+            return sorted([entry.name, entry.stat().st_mtime_ns, entry.stat().st_size]
+                          for entry in entries
+                          if (entry.name == name or entry.name.startswith(prefix)) and entry.is_file())
+    except OSError:
+        return None
+
+def write_geometry_cache(cache_path, entry):
+    '''
+    Atomically writes a geometry cache entry, so that concurrent readers never see a partial file
+    '''
+    cache_dir = os.path.dirname(cache_path)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as err:
+        logging.warning(f"Could not write geometry cache {cache_path}: {err}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def validate_file(geometry_file):
         '''
         Makes sure that the vector file exists and is valid
         '''
+        file_key = geometry_file_key(geometry_file)
+        cache_path = geometry_cache_path(geometry_file)
+        if file_key is not None and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r') as f:
+                    cached = json.load(f)
+                if cached['file'] == file_key:
+                    return cached['epsg'], cached['wkt']
+            except (IOError, ValueError, KeyError, TypeError) as err:
+                logging.warning(f"Ignoring invalid geometry cache {cache_path}: {err}")
+
         try:
-            test_gpd = gpd.read_file(geometry_file)
+            test_gpd = gpd.read_file(geometry_file, engine='pyogrio')
         except DataSourceError as err:
             logging.error(f"-geometry_file : {err}")
             sys.exit()
@@ -437,9 +804,12 @@ def validate_file(geometry_file):
             logging.error(f"-geometry_file : {err}")
             sys.exit()
 
-        test_wkt = str(test_gpd.union_all())
+        test_wkt = str(shapely.unary_union(test_gpd.geometry.values))
         test_epsg = test_gpd.crs.to_epsg()
 
+        if file_key is not None:
+            write_geometry_cache(cache_path, {'file': file_key, 'epsg': test_epsg, 'wkt': test_wkt})
+
         return test_epsg,test_wkt
 
 def validate_wkt_epsg(epsg_text,wkt_text):
@@ -479,6 +849,8 @@ if __name__ == "__main__":
     group_query.add_argument("-outputDir",type=str, required=False, default=None, help="Output directory to store AWIC data, required if returnMode is csv or csv_and_variable")
     group_query.add_argument("-cloudCoverageMax", type=str, required=False, default=100, help="Maximum percentage of cloud or cloud shadow data between 0 and 100. Default value is 100.")
     group_query.add_argument("-requestGeometries", type=str, required=False, default='False', help="Boolean to indicate if the geometries should be retrieved (true|false). Default value is False.")
+    group_query.add_argument("-compressCsv", type=str, required=False, default='False', help="Boolean to indicate if the CSV files should be gzip-compressed (true|false). Default value is False.")
+    group_query.add_argument("-tileSize", type=float, required=False, default=None, help="Split large geometries into tiles of this size, requested concurrently, in the units of the geometry (degrees for WGS84, meters for LAEA). Default value is None (no split).")
 
     group_mode_s = parser.add_argument_group("selection mode")
     group_mode_sel = group_mode_s.add_mutually_exclusive_group()
@@ -517,4 +889,6 @@ if __name__ == "__main__":
             geometrywkt_wgs84=geometrywkt_wgs84,
             geometrywkt_laea=geometrywkt_laea,
             cloudCoverageMax=args.cloudCoverageMax,
-            requestGeometries=str2bool(args.requestGeometries))
+            requestGeometries=str2bool(args.requestGeometries),
+            compressCsv=str2bool(args.compressCsv),
+            tileSize=args.tileSize)